@@ -0,0 +1,102 @@
+"""
+Shared demo scenario for the mycelium examples.
+
+One source of truth for the operations every driver runs: OPS is the
+structured form used by the in-process, repl and batch paths; CLI_OPS is
+the same scenario as argv lists for the spawn-per-operation path.
+"""
+
+# The demo scenario: (label, command) pairs shared by the repl and batch paths.
+# Frozen tuples: re-execution in a warm interpreter (see basic_usage.replay)
+# reuses these without rebuilding anything.
+OPS: tuple = (
+    ("1. Exuding a memory as 'agent-a'...", {
+        "cmd": "exude",
+        "args": {
+            "agent": "agent-a",
+            "domains": ["code", "infrastructure"],
+            "confidence": "canonical",
+            "urgency": "critical",
+            "content": "Always run tests before deploying to production.",
+        },
+    }),
+    ("\n2. Tasting memories as 'agent-b' in code domain...", {
+        "cmd": "taste",
+        "args": {"agent": "agent-b", "domains": ["code"], "limit": 5},
+    }),
+    ("\n3. Writing a ghost trace (deliberation pattern)...", {
+        "cmd": "superpose",
+        "args": {
+            "agent": "agent-a",
+            "domains": ["infrastructure"],
+            "collapsed_to": "use async",
+            "collapse_reason": "Performance wins outweigh complexity cost",
+            "branches": [
+                {"label": "use sync", "weight": 0.2, "reasoning": "simpler code"},
+                {"label": "use async", "weight": 0.7, "reasoning": "better performance"},
+                {"label": "hybrid", "weight": 0.1, "reasoning": "complexity concern"},
+            ],
+        },
+    }),
+    ("\n4. Tasting with ghost traces...", {
+        "cmd": "taste_ghosts",
+        "args": {"agent": "agent-b", "domains": ["infrastructure"]},
+    }),
+    ("\n5. Asking a question into the substrate...", {
+        "cmd": "exude",
+        "args": {
+            "agent": "agent-c",
+            "domains": ["infrastructure"],
+            "entry_type": "question",
+            "content": "Should we use Redis or Postgres for session state?",
+        },
+    }),
+)
+
+
+# The same scenario as argv lists for the spawn-per-operation path.
+CLI_OPS: tuple = (
+    ("1. Exuding a memory as 'agent-a'...", [
+        "exude",
+        "--agent",      "agent-a",
+        "--domain",     "code", "infrastructure",
+        "--confidence", "canonical",
+        "--urgency",    "critical",
+        "--content",    "Always run tests before deploying to production.",
+    ]),
+    ("\n2. Tasting memories as 'agent-b' in code domain...", [
+        "taste",
+        "--agent", "agent-b",
+        "--domain", "code",
+        "--limit", "5",
+    ]),
+    ("\n3. Writing a ghost trace (deliberation pattern)...", [
+        "superpose",
+        "--agent",          "agent-a",
+        "--domain",         "infrastructure",
+        "--collapsed-to",   "use async",
+        "--collapse-reason", "Performance wins outweigh complexity cost",
+        "--branch", "use sync:0.2:simpler code",
+        "--branch", "use async:0.7:better performance",
+        "--branch", "hybrid:0.1:complexity concern",
+    ]),
+    ("\n4. Tasting with ghost traces...", [
+        "taste",
+        "--agent",  "agent-b",
+        "--domain", "infrastructure",
+        "--ghosts",
+        "--limit",  "3",
+    ]),
+    ("\n5. Asking a question into the substrate...", [
+        "exude",
+        "--agent",   "agent-c",
+        "--domain",  "infrastructure",
+        "--type",    "question",
+        "--content", "Should we use Redis or Postgres for session state?",
+    ]),
+    ("\n6. Substrate stats...", ["stats"]),
+)
+
+# Ops within a wave are independent; wave B reads what wave A wrote
+# (the tastes and stats depend on the exude/superpose writes).
+CLI_WAVES = [(0, 2, 4), (1, 3, 5)]
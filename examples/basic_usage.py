@@ -3,88 +3,380 @@
 Mycelium Basic Usage Example
 
 Demonstrates exude, taste, superpose, and resonance workflows.
+
+By default this imports mycelium and calls its functions directly — one
+interpreter, zero execve, so the example doubles as a functional
+benchmark of the library itself. The subprocess transports are kept as
+opt-in fallbacks: --repl drives one long-lived `mycelium.py repl` child,
+--batch ships the whole scenario as a single `mycelium batch`
+invocation, and --cli is the original spawn-a-process-per-operation
+path.
 """
 
+import errno
+import json
+import os
+import selectors
+import struct
 import subprocess
 import sys
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+try:
+    # orjson parses/serializes the repl and batch glue messages ~2-5x
+    # faster than stdlib json; fall back silently when not installed.
+    import orjson
+
+    def dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    loads = orjson.loads
+except ImportError:
+    dumps = json.dumps
+    loads = json.loads
+
+from _scenarios import CLI_OPS, CLI_WAVES, OPS
+
+try:
+    # Optional io_uring drain path (USE_IO_URING=1, Linux 5.19+): batches
+    # many pipe reads into one io_uring_enter instead of a syscall each.
+    import liburing
+except ImportError:
+    liburing = None
+
+USE_IO_URING = os.environ.get("USE_IO_URING") == "1" and liburing is not None
+
+PY = sys.executable
+SCRIPT = str(Path(__file__).resolve().parent.parent / "src" / "mycelium.py")
+
+# Subprocess cold-start trim: children must be able to write .pyc files
+# so warm_bytecode()'s precompile stays warm — PYTHONDONTWRITEBYTECODE is
+# dropped from the inherited env because ANY non-empty value (even "0")
+# means -B. An empty PYTHONSTARTUP avoids surprise work in the child.
+# No -S: mycelium probes site-packages for its optional accelerators
+# (orjson, xxhash, simdjson, ...), and skipping site.py would silently
+# disable every one of them in the children. Measure with:
+#   python3 -X importtime ../src/mycelium.py --help 2> import.log
+PY_CMD = [PY, SCRIPT]
+ENV = {
+    **os.environ,
+    "PYTHONSTARTUP": "",
+}
+ENV.pop("PYTHONDONTWRITEBYTECODE", None)
+
+
+def warm_bytecode():
+    """Pre-compile mycelium once so every child starts from cached .pyc."""
+    import compileall
+    compileall.compile_dir(str(Path(SCRIPT).parent), quiet=1)
+
+
+def spawn(argv: list[str], **kwargs) -> subprocess.Popen:
+    """Launch a child on subprocess's posix_spawn fast path.
+
+    CPython only uses os.posix_spawn (skipping fork's page-table copy)
+    when the call has no preexec_fn/pass_fds, close_fds=False and no new
+    session — pin those conditions here so every launch stays on it.
+    Verify with: strace -f -e clone,execve python3 basic_usage.py --cli
+    """
+    return subprocess.Popen(
+        argv,
+        close_fds=False,
+        start_new_session=False,
+        env=ENV,
+        **kwargs,
+    )
+
+
+class MyceliumSession:
+    """One persistent mycelium REPL subprocess; send() is one framed round-trip.
 
-SCRIPT = "../src/mycelium.py"
+    Frames are a 4-byte little-endian length plus a JSON payload — no argv
+    copy into the child and no argparse walk per operation.
+    """
 
-def run(args: list[str]) -> str:
-    result = subprocess.run(
-        [sys.executable, SCRIPT] + args,
-        capture_output=True,
+    def __init__(self, proc: subprocess.Popen):
+        self.proc = proc
+
+    def send(self, cmd: str, **args) -> dict:
+        payload = dumps({"cmd": cmd, "args": args}).encode()
+        self.proc.stdin.write(struct.pack("<I", len(payload)) + payload)
+        self.proc.stdin.flush()
+        (size,) = struct.unpack("<I", self.proc.stdout.read(4))
+        return loads(self.proc.stdout.read(size))
+
+
+@contextmanager
+def mycelium_session():
+    # stderr is inherited, not piped: the repl redirects handler prints
+    # there, and a pipe nobody drains would deadlock the session once a
+    # chatty operation (digest/distill progress lines) fills its 64 KiB.
+    proc = spawn(
+        PY_CMD + ["repl"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+    try:
+        yield MyceliumSession(proc)
+    finally:
+        proc.stdin.close()
+        proc.wait()
+
+
+def show(resp: dict):
+    if resp.get("ok"):
+        print(json.dumps(resp["result"], indent=2))
+    else:
+        print(f"error: {resp.get('error')}")
+
+
+def run(args: list[str]):
+    """Yield the child's output line by line as it is produced.
+
+    Streaming keeps the working set at one line instead of the whole
+    response and gets first output on screen before the child exits.
+    """
+    proc = spawn(
+        PY_CMD + args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
         text=True,
+        bufsize=1,
     )
-    return result.stdout + result.stderr
+    try:
+        yield from iter(proc.stdout.readline, "")
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+
+def stream(args: list[str]):
+    for line in run(args):
+        print(line, end="")
 
 
 def main():
+    """Default path: call the library in-process, no subprocess at all."""
+    sys.path.insert(0, str(Path(SCRIPT).parent))
+    import mycelium
+
     print("=== Mycelium Basic Usage ===\n")
 
-    # 1. Exude a memory
-    print("1. Exuding a memory as 'agent-a'...")
-    output = run([
-        "exude",
-        "--agent",      "agent-a",
-        "--domain",     "code", "infrastructure",
-        "--confidence", "canonical",
-        "--urgency",    "critical",
-        "--content",    "Always run tests before deploying to production."
-    ])
-    print(output)
-
-    # 2. Taste memories
-    print("\n2. Tasting memories as 'agent-b' in code domain...")
-    output = run([
-        "taste",
-        "--agent", "agent-b",
-        "--domain", "code",
-        "--limit", "5",
-    ])
-    print(output)
-
-    # 3. Superpose (ghost trace)
-    print("\n3. Writing a ghost trace (deliberation pattern)...")
-    output = run([
-        "superpose",
-        "--agent",          "agent-a",
-        "--domain",         "infrastructure",
-        "--collapsed-to",   "use async",
-        "--collapse-reason", "Performance wins outweigh complexity cost",
-        "--branch", "use sync:0.2:simpler code",
-        "--branch", "use async:0.7:better performance",
-        "--branch", "hybrid:0.1:complexity concern",
-    ])
-    print(output)
-
-    # 4. Taste with ghosts
-    print("\n4. Tasting with ghost traces...")
-    output = run([
-        "taste",
-        "--agent",  "agent-b",
-        "--domain", "infrastructure",
-        "--ghosts",
-        "--limit",  "3",
-    ])
-    print(output)
-
-    # 5. Ask a question
-    print("\n5. Asking a question into the substrate...")
-    output = run([
-        "exude",
-        "--agent",   "agent-c",
-        "--domain",  "infrastructure",
-        "--type",    "question",
-        "--content", "Should we use Redis or Postgres for session state?",
-    ])
-    print(output)
-
-    # 6. Stats
+    for label, op in OPS:
+        print(label)
+        result = mycelium.COMMAND_HANDLERS[op["cmd"]](**op["args"])
+        print(json.dumps(result, indent=2))
+
+    # The library buffers appends in cached handles; push them to disk
+    # before a separate process goes looking for the entries.
+    mycelium._flush_writes()
+
+    # 6. Stats (one-shot report, plain CLI)
     print("\n6. Substrate stats...")
-    output = run(["stats"])
-    print(output)
+    stream(["stats"])
 
 
-if __name__ == "__main__":
+def replay():
+    """Re-run the in-process scenario inside an already-warm interpreter:
+
+        python3 -c "import basic_usage; basic_usage.replay()"
+
+    Useful when embedding this example in a benchmark harness — the
+    frozen scenario tuples and imported modules are reused, so a rerun
+    costs only the operations themselves.
+    """
     main()
+
+
+def main_repl():
+    print("=== Mycelium Basic Usage ===\n")
+
+    with mycelium_session() as sess:
+        for label, op in OPS:
+            print(label)
+            show(sess.send(op["cmd"], **op["args"]))
+
+    # 6. Stats (one-shot report, plain CLI)
+    print("\n6. Substrate stats...")
+    stream(["stats"])
+
+
+def main_batch():
+    """Send all operations as one `mycelium batch` invocation — a single
+    process spawn and interpreter startup for the whole scenario."""
+    print("=== Mycelium Basic Usage (batch) ===\n")
+
+    proc = spawn(
+        PY_CMD + ["batch"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    stdout, _ = proc.communicate(input=dumps([op for _, op in OPS]))
+    responses = [loads(line) for line in stdout.splitlines() if line.strip()]
+    for (label, _), resp in zip(OPS, responses):
+        print(label)
+        show(resp)
+
+    print("\n6. Substrate stats...")
+    stream(["stats"])
+
+
+@dataclass
+class Result:
+    """Captured child output, kept as bytes end to end: the caller hands
+    them straight to sys.stdout.buffer with no decode/concat round trip."""
+    stdout: bytes
+    stderr: bytes
+    returncode: int
+
+
+def _run_wave_uring(indices) -> dict[int, "Result"]:
+    """io_uring variant of run_wave: prep one read SQE per open pipe and
+    submit them in a batch, so one io_uring_enter amortizes many reads.
+
+    The ring is set up before any child is spawned: queue_init is where
+    unsupported kernels refuse (DEFER_TASKRUN needs 6.1+), and failing
+    there lets run_wave fall back to the selector with nothing launched.
+    A failure after the spawns must NOT propagate — the fallback would
+    relaunch the wave and run every write twice — so from that point the
+    children are drained and reaped here, whatever happens.
+    """
+    ring = liburing.io_uring()
+    liburing.io_uring_queue_init(
+        len(indices) * 2, ring,
+        liburing.IORING_SETUP_SINGLE_ISSUER | liburing.IORING_SETUP_DEFER_TASKRUN,
+    )
+    cqe = liburing.io_uring_cqe()
+    procs: dict[int, subprocess.Popen] = {}
+    bufs: dict[int, bytearray] = {}
+    fds: dict[int, int] = {}
+    try:
+        for i in indices:
+            proc = spawn(
+                PY_CMD + CLI_OPS[i][1],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            )
+            procs[i] = proc
+            bufs[i] = bytearray()
+            fds[proc.stdout.fileno()] = i
+
+        open_fds = set(fds)
+        scratch = {fd: bytearray(65536) for fd in open_fds}
+        pending: set[int] = set()
+        while open_fds or pending:
+            for fd in open_fds - pending:
+                sqe = liburing.io_uring_get_sqe(ring)
+                liburing.io_uring_prep_read(sqe, fd, scratch[fd], len(scratch[fd]), 0)
+                sqe.user_data = fd
+                pending.add(fd)
+            liburing.io_uring_submit(ring)
+            liburing.io_uring_wait_cqe(ring, cqe)
+            fd, res = cqe.user_data, cqe.res
+            liburing.io_uring_cqe_seen(ring, cqe)
+            pending.discard(fd)
+            if res > 0:
+                bufs[fds[fd]] += scratch[fd][:res]
+            elif res == 0:
+                open_fds.discard(fd)  # EOF — only res == 0 means that
+            elif res in (-errno.EINTR, -errno.EAGAIN):
+                pass  # transient: fd stays in open_fds and is re-prepped
+            else:
+                # Hard error completion (-ENOMEM, ...): don't drop the
+                # rest of this child's output — no SQE is in flight for
+                # the fd now, so drain it with plain blocking reads.
+                open_fds.discard(fd)
+                rest = procs[fds[fd]].stdout.read()
+                if rest:
+                    bufs[fds[fd]] += rest
+    except Exception:
+        for i, proc in procs.items():
+            rest = proc.stdout.read()
+            if rest:
+                bufs[i] += rest
+    finally:
+        liburing.io_uring_queue_exit(ring)
+
+    results = {}
+    for i, proc in procs.items():
+        proc.stdout.close()
+        results[i] = Result(bytes(bufs[i]), b"", proc.wait())
+    return results
+
+
+def run_wave(indices) -> dict[int, "Result"]:
+    """Spawn one child per op and drain every pipe from one selector loop.
+
+    A single epoll_wait services whichever children have output ready —
+    no thread per child, one poller regardless of fan-out width. With
+    USE_IO_URING=1 and python-liburing installed, reads are batched
+    through io_uring instead; any failure degrades back to the selector.
+    """
+    if USE_IO_URING:
+        try:
+            return _run_wave_uring(indices)
+        except Exception:
+            pass  # older kernel or missing opcode support — use the selector
+    sel = selectors.DefaultSelector()
+    procs: dict[int, subprocess.Popen] = {}
+    bufs: dict[tuple[int, str], bytearray] = {}
+    for i in indices:
+        proc = spawn(
+            PY_CMD + CLI_OPS[i][1],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        sel.register(proc.stdout, selectors.EVENT_READ, (i, "stdout"))
+        sel.register(proc.stderr, selectors.EVENT_READ, (i, "stderr"))
+        procs[i] = proc
+        bufs[(i, "stdout")] = bytearray()
+        bufs[(i, "stderr")] = bytearray()
+    remaining = 2 * len(procs)
+    while remaining:
+        for key, _ in sel.select():
+            chunk = key.fileobj.read1(65536)
+            if chunk:
+                bufs[key.data] += chunk
+            else:
+                sel.unregister(key.fileobj)
+                key.fileobj.close()
+                remaining -= 1
+    sel.close()
+    return {
+        i: Result(bytes(bufs[(i, "stdout")]), bytes(bufs[(i, "stderr")]), procs[i].wait())
+        for i in indices
+    }
+
+
+def main_cli():
+    """Original path: one subprocess per operation, fanned out per wave."""
+    print("=== Mycelium Basic Usage ===\n")
+
+    results: list = [None] * len(CLI_OPS)
+    for wave in CLI_WAVES:
+        for i, result in run_wave(wave).items():
+            results[i] = result
+
+    out = sys.stdout.buffer
+    for (label, _), result in zip(CLI_OPS, results):
+        out.write(label.encode() + b"\n")
+        out.write(result.stdout)
+        out.write(result.stderr)
+        out.write(b"\n")
+    out.flush()
+
+
+if __name__ == "__main__":
+    warm_bytecode()
+    if "--cli" in sys.argv:
+        main_cli()
+    elif "--batch" in sys.argv:
+        main_batch()
+    elif "--repl" in sys.argv:
+        main_repl()
+    else:
+        main()
@@ -27,28 +27,111 @@ Usage:
   python3 mycelium.py stats
 """
 
-import json, sys, argparse, datetime, hashlib, re, os
+import atexit, json, sys, argparse, contextlib, datetime, functools, hashlib, heapq, mmap, re, os, pickle, shutil, struct, threading, time
 from pathlib import Path
 from typing import Optional
-from collections import deque
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    # Optional: collapses the per-entry scoring loop into array arithmetic.
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    # Optional: ~3-5x faster encode/decode on the per-line hot paths.
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so the
+    # existing except clauses keep working either way.
+    import orjson
+
+    def dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    def dumpb(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    loads = orjson.loads
+except ImportError:
+    orjson = None
+    dumps = json.dumps
+    loads = json.loads
+
+    def dumpb(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+try:
+    # Optional: non-cryptographic hash for the in-process dedup window.
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    # Optional: single-pass multi-keyword scan for distill's signal check.
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    # Optional: SIMD structural NDJSON parsing for the dump walk.
+    import simdjson
+except ImportError:
+    simdjson = None
+
+_tls = threading.local()
+
+def _simd_parser():
+    """One simdjson parser per thread, reused across files.
+
+    Recreating a parser per document reallocates its padded scratch
+    buffer; a process-global one is out because parsers are not
+    thread-safe and the dump renderers run in a pool. Thread-local
+    splits the difference: each worker allocates once.
+    """
+    parser = getattr(_tls, "simd_parser", None)
+    if parser is None:
+        parser = _tls.simd_parser = simdjson.Parser()
+    return parser
 
 # ── Paths ────────────────────────────────────────────────────────────────────
 # Default: store in same directory as script. Override with MYCELIUM_DIR env var.
 MYCELIUM_DIR = Path(os.environ.get("MYCELIUM_DIR", Path(__file__).parent))
 MYCELIUM_PATH = MYCELIUM_DIR / "mycelium.jsonl"  # Legacy single-file path
 RESONANCE_PATH = MYCELIUM_DIR / "mycelium.resonance.json"
+RESONANCE_LOG = MYCELIUM_DIR / "mycelium.resonance.log"
+RESONANCE_LOG_MAX = 64 * 1024  # compact the taste log into the sidecar past this
 
 # v1.1: Domain-based file separation
 # Add your domains here. Entries go to mycelium-{domain}.jsonl
 DEFAULT_DOMAINS = ["general", "code", "infrastructure"]
 
+@functools.cache
 def _get_domain_files() -> dict:
-    """Get domain -> path mapping. Creates files on demand."""
+    """Get domain -> path mapping (built once; MYCELIUM_DIR is fixed at import)."""
     return {d: MYCELIUM_DIR / f"mycelium-{d}.jsonl" for d in DEFAULT_DOMAINS}
 
 TASTE_LIMIT = 50
 DEDUP_WINDOW = 100  # Check last N entries for duplicates
-_recent_hashes: dict[str, deque] = {}
+# Per-domain dedup windows: insertion-ordered dicts used as fixed-size
+# LRUs — O(1) membership and eviction, where the old deque paid a linear
+# scan per lookup.
+_recent_hashes: dict[str, dict] = {}
+
+_last_stamp: tuple[int, str] = (0, "")
+
+def _now_stamp() -> str:
+    """Second-resolution UTC timestamp for entry/resonance records.
+
+    Formatting goes through isoformat rather than strftime, and burst
+    writers (distill/digest can emit dozens of entries in one call)
+    reuse the cached string while the wall clock stays on one second.
+    """
+    global _last_stamp
+    sec = int(time.time())
+    if sec != _last_stamp[0]:
+        stamp = datetime.datetime.fromtimestamp(sec, datetime.UTC).isoformat()
+        _last_stamp = (sec, stamp.replace("+00:00", "Z"))
+    return _last_stamp[1]
 
 # ── Scoring weights ───────────────────────────────────────────────────────────
 CONFIDENCE_WEIGHT = {
@@ -79,10 +162,45 @@ def _get_domain_path(domain: str | list) -> Path:
     # Unknown domain → create new file for it
     return MYCELIUM_DIR / f"mycelium-{domain}.jsonl"
 
+# ── Append handles ────────────────────────────────────────────────────────────
+# One buffered append handle per substrate file, opened on first write and
+# closed (flushing) at exit — a burst of exudes costs one open instead of
+# an open/close round trip per entry. Readers flush before touching a file
+# so no byte is invisible to the process that wrote it.
+
+_domain_fh: dict = {}  # Path -> buffered binary append handle
+
+def _get_fh(path: Path):
+    fh = _domain_fh.get(path)
+    if fh is None or fh.closed:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fh = open(path, "ab", buffering=1 << 16)
+        _domain_fh[path] = fh
+    return fh
+
+def _flush_writes(path: Optional[Path] = None):
+    """Flush cached append handles (all of them, or just one path's)."""
+    for p, fh in _domain_fh.items():
+        if (path is None or p == path) and not fh.closed:
+            fh.flush()
+
+@atexit.register
+def _close_write_handles():
+    for fh in _domain_fh.values():
+        try:
+            fh.close()
+        except OSError:
+            pass
+
 # ── v1.1: Dedup ───────────────────────────────────────────────────────────────
 
-def _content_hash(entry: dict) -> str:
-    """Hash the semantic content of an entry for dedup."""
+def _content_hash(entry: dict) -> int:
+    """Hash the semantic content of an entry for dedup.
+
+    Dedup keys never leave the process, so the fastest available hash
+    wins: xxh3 when installed, blake2b otherwise — both beat the MD5
+    this used, which bought cryptographic strength nobody needed.
+    """
     content_parts = [
         entry.get("type", "lesson"),
         str(entry.get("domain", [])),
@@ -90,17 +208,24 @@ def _content_hash(entry: dict) -> str:
         entry.get("confidence", "observation"),
         entry.get("urgency", "routine"),
     ]
-    key = "|".join(content_parts)
-    return hashlib.md5(key.encode()).hexdigest()[:16]
+    key = "|".join(content_parts).encode()
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(key)
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
 
 def _is_duplicate(domain: str, entry: dict) -> bool:
     """Check if this entry is a duplicate of a recent one."""
     h = _content_hash(entry)
-    if domain not in _recent_hashes:
-        _recent_hashes[domain] = deque(maxlen=DEDUP_WINDOW)
-    if h in _recent_hashes[domain]:
+    window = _recent_hashes.get(domain)
+    if window is None:
+        # Lazy path: warm this domain's window on first write need
+        _load_domain_hashes(domain)
+        window = _recent_hashes.setdefault(domain, {})
+    if h in window:
         return True
-    _recent_hashes[domain].append(h)
+    if len(window) >= DEDUP_WINDOW:
+        del window[next(iter(window))]
+    window[h] = None
     return False
 
 def _load_domain_hashes(domain: str):
@@ -108,124 +233,470 @@ def _load_domain_hashes(domain: str):
     path = _get_domain_path(domain)
     if not path.exists():
         return
-    if domain not in _recent_hashes:
-        _recent_hashes[domain] = deque(maxlen=DEDUP_WINDOW)
-    entries = []
-    with open(path) as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                entry = json.loads(line)
-                entries.append(entry)
-            except json.JSONDecodeError:
-                continue
-    for entry in entries[-DEDUP_WINDOW:]:
-        h = _content_hash(entry)
-        _recent_hashes[domain].append(h)
+    window = _recent_hashes.setdefault(domain, {})
+    # Ride the snapshot loader: on a warm sidecar this is an unpickle (or
+    # an in-process cache hit) and the dedup hashes come precomputed with
+    # the entries — warming hashes nothing unless the sidecar is cold.
+    for entry in _load_entries(path)[-DEDUP_WINDOW:]:
+        window[entry.get("_ch") or _content_hash(entry)] = None
 
 # ── Resonance sidecar ─────────────────────────────────────────────────────────
 
+RESONANCE_VERSION = 2  # bumped whenever the _entry_hash scheme changes
+
 def _entry_hash(entry: dict) -> str:
     """Stable hash for a memory entry — ts + agent + first 64 chars of content."""
     key = f"{entry.get('ts','')}{entry.get('agent','')}{entry.get('content','')[:64]}"
-    return hashlib.md5(key.encode()).hexdigest()[:12]
+    return hashlib.blake2b(key.encode(), digest_size=6).hexdigest()
+
+def _cached_hash(entry: dict) -> str:
+    """_entry_hash with the result cached on the dict under _h.
+
+    Entries from the snapshot loader carry _h already; anything that
+    bypassed _prime (raw prune lines, fresh superpose returns) is hashed
+    once here and the score, record and display paths all reuse it.
+    """
+    h = entry.get("_h")
+    if h is None:
+        h = entry["_h"] = _entry_hash(entry)
+    return h
+
+# One in-process copy of the resonance sidecar. taste is a read command,
+# yet it used to rewrite the whole sidecar synchronously per call; taste
+# events now mutate the cache and the file is flushed once at exit. The
+# cache invalidates on the sidecar's mtime so long-lived library embeds
+# pick up writes from other processes at the cost of one stat() per call.
+_res_cache: Optional[dict] = None
+_res_mtime: float = -1.0
+_res_dirty = False
+_taste_pending: list[bytes] = []  # queued taste-log lines, appended at exit
 
 def _load_resonance() -> dict:
+    global _res_cache, _res_mtime
+    try:
+        m = RESONANCE_PATH.stat().st_mtime
+    except OSError:
+        m = 0.0
+    if _res_cache is None or m != _res_mtime:
+        if _res_dirty:
+            # Unflushed taste events take precedence over a disk re-read;
+            # they reach the file at the next flush.
+            return _res_cache
+        _res_cache = _read_resonance()
+        _res_mtime = m
+    return _res_cache
+
+def _read_resonance() -> dict:
+    data = {}
     if RESONANCE_PATH.exists():
         try:
-            return json.loads(RESONANCE_PATH.read_text())
+            data = loads(RESONANCE_PATH.read_bytes())
         except Exception:
-            return {}
-    return {}
+            data = {}
+        if data and data.pop("_v", None) != RESONANCE_VERSION:
+            data = _rehash_resonance(data)
+    return _replay_taste_log(data)
+
+def _replay_taste_log(data: dict) -> dict:
+    """Fold queued taste events from the append-only log into the sidecar
+    state; compact (rewrite JSON, truncate log) once the log gets big."""
+    try:
+        log_bytes = RESONANCE_LOG.read_bytes()
+    except OSError:
+        return data
+    for line in log_bytes.splitlines():
+        h, _, ts = line.partition(b"\t")
+        if not h:
+            continue
+        rec = data.setdefault(h.decode(), {"taste_count": 0, "last_tasted": None})
+        rec["taste_count"] += 1
+        rec["last_tasted"] = ts.decode() or rec["last_tasted"]
+    if len(log_bytes) > RESONANCE_LOG_MAX:
+        _save_resonance(data)
+        RESONANCE_LOG.unlink(missing_ok=True)
+    return data
+
+def _rehash_resonance(data: dict) -> dict:
+    """One-shot remap of resonance keys after an _entry_hash scheme change."""
+    remap = {}
+    for path in [*_get_domain_files().values(), MYCELIUM_PATH]:
+        for entry in _load_entries(path):
+            key = f"{entry.get('ts','')}{entry.get('agent','')}{entry.get('content','')[:64]}"
+            old = hashlib.md5(key.encode()).hexdigest()[:12]
+            remap[old] = hashlib.blake2b(key.encode(), digest_size=6).hexdigest()
+    migrated = {remap[h]: r for h, r in data.items() if h in remap}
+    _save_resonance(migrated)
+    return migrated
 
 def _save_resonance(data: dict):
-    RESONANCE_PATH.write_text(json.dumps(data, indent=2))
+    global _res_cache, _res_mtime, _res_dirty
+    _res_cache = data
+    _res_dirty = False
+    out = {**data, "_v": RESONANCE_VERSION}
+    if orjson is not None:
+        payload = orjson.dumps(out, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(out, indent=2).encode()
+    # Atomic swap — a reader never sees a half-written sidecar.
+    tmp = RESONANCE_PATH.with_suffix(".json.tmp")
+    tmp.write_bytes(payload)
+    os.replace(tmp, RESONANCE_PATH)
+    try:
+        _res_mtime = RESONANCE_PATH.stat().st_mtime
+    except OSError:
+        pass
 
 def _record_taste(entry_hashes: list[str]):
-    """Record that these memories were retrieved. This IS the resonance signal."""
-    now = datetime.datetime.now(datetime.UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+    """Record that these memories were retrieved. This IS the resonance signal.
+
+    The sidecar is not rewritten here: events mutate the in-process cache
+    (so this invocation sees its own boosts) and queue hash\tts lines for
+    the append-only taste log — O(k) bytes at exit instead of an
+    O(|resonance|) JSON rewrite per taste.
+    """
+    global _res_dirty
+    now = _now_stamp()
     res = _load_resonance()
     for h in entry_hashes:
         if h not in res:
             res[h] = {"taste_count": 0, "last_tasted": None}
         res[h]["taste_count"] += 1
         res[h]["last_tasted"] = now
-    _save_resonance(res)
+    _res_dirty = True
+    _taste_pending.append("".join(f"{h}\t{now}\n" for h in entry_hashes).encode())
+
+@atexit.register
+def _flush_resonance():
+    global _res_dirty
+    if _taste_pending:
+        with open(RESONANCE_LOG, "ab") as f:
+            f.writelines(_taste_pending)
+        _taste_pending.clear()
+        _res_dirty = False
 
 # ── Scoring ───────────────────────────────────────────────────────────────────
 
-def _score(entry: dict, resonance: dict) -> float:
+def _score(entry: dict, resonance: dict, now_epoch: Optional[float] = None, *,
+           _boost: float = RESONANCE_BOOST,
+           _decay: float = DECAY_PER_DAY / 86400.0,
+           _conf: dict = CONFIDENCE_WEIGHT,
+           _urg: dict = URGENCY_WEIGHT) -> float:
     """
     Score = resonance_boost + confidence + urgency - age_decay - superseded_penalty
     Higher = more relevant, surface first.
+
+    Callers scoring many entries should capture now_epoch once and pass
+    it in rather than paying a clock read per entry. The weight tables
+    and constants are partial-evaluated into keyword defaults at def
+    time, so per-call they resolve as locals, not module globals.
     """
-    h = _entry_hash(entry)
+    h = _cached_hash(entry)
     r = resonance.get(h, {})
 
-    taste_score = r.get("taste_count", 0) * RESONANCE_BOOST
-    conf_score = CONFIDENCE_WEIGHT.get(entry.get("confidence", "observation"), 1.0)
-    urgency_score = URGENCY_WEIGHT.get(entry.get("urgency", "routine"), 0.0)
-
-    ts_str = entry.get("ts", "")
-    try:
-        ts = datetime.datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
-        now = datetime.datetime.now(datetime.timezone.utc)
-        age_days = (now - ts).total_seconds() / 86400
-    except Exception:
-        age_days = 0
+    taste_score = r.get("taste_count", 0) * _boost
+    static = entry.get("_static")
+    if static is None:
+        static = (_conf.get(entry.get("confidence", "observation"), 1.0)
+                  + _urg.get(entry.get("urgency", "routine"), 0.0))
+
+    if now_epoch is None:
+        now_epoch = datetime.datetime.now(datetime.timezone.utc).timestamp()
+    epoch = entry.get("_ts_epoch")
+    if epoch is None:
+        # Entry didn't come through _prime (raw prune lines, pre-upgrade
+        # snapshots) — parse once and cache on the dict for repeat calls.
+        epoch = _entry_epoch(entry)
+        if epoch is None:
+            epoch = now_epoch
+        else:
+            entry["_ts_epoch"] = epoch
 
-    age_penalty = age_days * DECAY_PER_DAY
+    age_penalty = (now_epoch - epoch) * _decay
     superseded_penalty = 2.0 if entry.get("superseded") else 0.0
 
-    return taste_score + conf_score + urgency_score - age_penalty - superseded_penalty
+    return taste_score + static - age_penalty - superseded_penalty
+
+def _score_many(entries: list[dict], resonance: dict) -> list[float]:
+    """Score a batch of entries in one pass.
+
+    With NumPy installed the weighted sum runs as a few vectorized array
+    ops over columns pulled out of the entries (SoA style); otherwise it
+    falls back to the scalar _score loop. Small batches stay scalar —
+    array setup costs more than it saves there.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc).timestamp()
+    if np is None or len(entries) < 64:
+        # Mirrors _score with everything it touches bound to locals —
+        # no LOAD_GLOBAL / module-dict lookups inside the loop.
+        res_get = resonance.get
+        boost = RESONANCE_BOOST
+        decay = DECAY_PER_DAY / 86400.0
+        conf = CONFIDENCE_WEIGHT
+        urg = URGENCY_WEIGHT
+        empty: dict = {}
+        scores = []
+        append = scores.append
+        for e in entries:
+            r = res_get(_cached_hash(e), empty)
+            static = e.get("_static")
+            if static is None:
+                static = (conf.get(e.get("confidence", "observation"), 1.0)
+                          + urg.get(e.get("urgency", "routine"), 0.0))
+            epoch = e.get("_ts_epoch")
+            if epoch is None:
+                epoch = _entry_epoch(e)
+                if epoch is None:
+                    epoch = now
+                else:
+                    e["_ts_epoch"] = epoch
+            append(r.get("taste_count", 0) * boost + static
+                   - (now - epoch) * decay
+                   - (2.0 if e.get("superseded") else 0.0))
+        return scores
+    n = len(entries)
+    empty: dict = {}
+    tastes = np.fromiter(
+        (resonance.get(_cached_hash(e), empty).get("taste_count", 0)
+         for e in entries), dtype=np.float64, count=n)
+    static = np.fromiter(
+        (e.get("_static") if e.get("_static") is not None else
+         CONFIDENCE_WEIGHT.get(e.get("confidence", "observation"), 1.0)
+         + URGENCY_WEIGHT.get(e.get("urgency", "routine"), 0.0)
+         for e in entries), dtype=np.float64, count=n)
+    epochs = np.fromiter(
+        (e["_ts_epoch"] if "_ts_epoch" in e else _entry_epoch(e, now)
+         for e in entries), dtype=np.float64, count=n)
+    superseded = np.fromiter(
+        (2.0 if e.get("superseded") else 0.0 for e in entries), dtype=np.float64, count=n)
+    scores = (tastes * RESONANCE_BOOST + static
+              - (now - epochs) * (DECAY_PER_DAY / 86400.0) - superseded)
+    return scores.tolist()
+
+def _entry_epoch(entry: dict, default: Optional[float] = None) -> Optional[float]:
+    try:
+        ts = entry["ts"]
+        if ts.endswith("Z"):
+            ts = ts[:-1] + "+00:00"
+        return datetime.datetime.fromisoformat(ts).timestamp()
+    except Exception:
+        return default
 
 # ── v1.1: Supersession marking ────────────────────────────────────────────────
 
 def _mark_superseded_entries(entries: list[dict]) -> list[dict]:
     """Mark entries that have been superseded by newer ones."""
-    superseded_timestamps = set()
-    for e in entries:
-        if e.get("supersedes"):
-            superseded_timestamps.add(e["supersedes"])
-    for e in entries:
-        if e.get("ts") in superseded_timestamps:
-            e["superseded"] = True
-            e["stale"] = True
+    superseded_timestamps = {s for e in entries if (s := e.get("supersedes"))}
+    if superseded_timestamps:
+        for e in entries:
+            if e.get("ts") in superseded_timestamps:
+                e["superseded"] = True
+                e["stale"] = True
     return entries
 
-# ── Core: taste ───────────────────────────────────────────────────────────────
+# ── Snapshot sidecar ──────────────────────────────────────────────────────────
+# Readers used to re-parse every JSONL line on every command. Each log now
+# gets a pickled sidecar holding its already-parsed entries plus the byte
+# offset they cover; only the tail appended since the last compaction is
+# JSON-parsed per call. The JSONL stays the append-only source of truth
+# (and stays human-readable) — the sidecar is a pure cache.
 
-def _read_domain_file(domain: str, domains: list, resonance: dict) -> list[dict]:
-    """Read entries from a single domain file."""
-    path = _get_domain_path(domain)
+SNAPSHOT_VERSION = 6
+# Dedup hashes persisted in snapshots must come from the same backend
+# that _content_hash will use, or warmed windows would never match.
+_CH_IMPL = "xxh3" if xxhash is not None else "blake2b"
+COMPACT_RATIO = 0.5  # recompact when tail bytes > ratio × snapshot bytes
+_entries_cache: dict = {}  # path -> (file size, entries) within one process
+
+def _snapshot_path(path: Path) -> Path:
+    return path.with_suffix(".snapshot.pkl")
+
+def _prime(entry: dict) -> dict:
+    """Attach derived fields that never change once an entry is stored.
+
+    Computed at parse time and persisted in the snapshot, so per-call
+    scoring skips the weight-table lookups for already-seen entries.
+    """
+    entry["_static"] = (CONFIDENCE_WEIGHT.get(entry.get("confidence", "observation"), 1.0)
+                        + URGENCY_WEIGHT.get(entry.get("urgency", "routine"), 0.0))
+    entry["_h"] = _entry_hash(entry)
+    entry["_ch"] = _content_hash(entry)
+    entry["_dset"] = _domain_set(entry)
+    epoch = _entry_epoch(entry)
+    if epoch is not None:
+        entry["_ts_epoch"] = epoch
+    if entry.get("type") == "ghost":
+        entry["_tokens"] = _ghost_tokens(entry)
+    return entry
+
+def _domain_set(entry: dict) -> frozenset:
+    d = entry.get("domain", [])
+    return frozenset([d] if isinstance(d, str) else d)
+
+def _load_entries(path: Path) -> list[dict]:
+    """All parsed entries of one JSONL file, via its snapshot sidecar."""
+    _flush_writes(path)
     if not path.exists():
         return []
-    entries = []
-    with open(path) as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
+    size = path.stat().st_size
+    cached = _entries_cache.get(path)
+    if cached and cached[0] == size:
+        return list(cached[1])
+
+    offset, entries = 0, []
+    snap_path = _snapshot_path(path)
+    if snap_path.exists():
+        try:
+            snap = pickle.loads(snap_path.read_bytes())
+            if (snap.get("version") == SNAPSHOT_VERSION
+                    and snap.get("ch_impl") == _CH_IMPL
+                    and snap.get("offset", 0) <= size):
+                offset = snap["offset"]
+                entries = snap["entries"]
+        except Exception:
+            pass  # corrupt/stale sidecar — fall through to a full rebuild
+
+    # Parse only the tail appended since the snapshot was taken. The file
+    # is mmapped and scanned for newlines as bytes — no read buffering,
+    # no per-line str decode before the JSON parser sees the line.
+    if offset < size:
+        with open(path, "rb") as f:
+            _advise_seq(f)
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
             try:
-                entry = json.loads(line)
-                entry_domains = entry.get("domain", [])
-                if isinstance(entry_domains, str):
-                    entry_domains = [entry_domains]
-                if domains and not any(d in entry_domains for d in domains):
-                    continue
-                entry["_score"] = _score(entry, resonance)
-                entries.append(entry)
-            except json.JSONDecodeError:
-                continue
-    return entries
+                start = offset
+                while start < size:
+                    nl = mm.find(b"\n", start)
+                    if nl < 0:
+                        nl = size
+                    line = mm[start:nl].strip()
+                    start = nl + 1
+                    if not line:
+                        continue
+                    try:
+                        entries.append(_prime(loads(line)))
+                    except json.JSONDecodeError:
+                        continue
+            finally:
+                mm.close()
+
+    if offset == 0 or (size - offset) > COMPACT_RATIO * offset:
+        _write_snapshot(snap_path, size, entries)
+
+    _entries_cache[path] = (size, entries)
+    return list(entries)
+
+def _map_scans(fn, items) -> list:
+    """Run fn over independent files in a thread pool; results in order.
+
+    The scans spend their time blocked in reads, which release the GIL,
+    so N domain files overlap instead of queueing behind each other.
+    Worker count follows the CPUs this process may actually use.
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [fn(i) for i in items]
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=min(len(items), cpus, 8)) as ex:
+        return list(ex.map(fn, items))
+
+def _advise_seq(f):
+    """Hint the kernel that f will be read front to back (bigger readahead).
+
+    Best effort: absent on Windows, and some filesystems refuse the
+    advice — either way the read itself is unaffected.
+    """
+    try:
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    except (AttributeError, OSError):
+        pass
+
+def _iter_jsonl(path: Path, chunksize: int = 1 << 16):
+    """Yield non-empty JSONL lines as bytes via chunked binary reads.
+
+    No text-mode decode and no readline state machine — the JSON parser
+    is the first thing to see each line. Used by the commands that still
+    walk files directly rather than through the snapshot loader.
+    """
+    _flush_writes(path)
+    buf = bytearray()
+    with open(path, "rb") as f:
+        _advise_seq(f)
+        while chunk := f.read(chunksize):
+            buf += chunk
+            start = 0
+            while (nl := buf.find(b"\n", start)) >= 0:
+                line = bytes(buf[start:nl]).strip()
+                start = nl + 1
+                if line:
+                    yield line
+            del buf[:start]
+    tail = bytes(buf).strip()
+    if tail:
+        yield tail
+
+def _count_lines(path: Path) -> Optional[int]:
+    """Count entries in a JSONL file without decoding a byte of it.
+
+    Missing files count as None rather than raising — callers probe
+    every candidate path without a stat round trip first. Raw fd reads
+    — no Python buffered-I/O layer — behind a WILLNEED
+    hint so the kernel prefetches the whole range up front. bytes.split
+    bottoms out in memchr, so the loop is I/O-bound. Reads stay chunked
+    because a single os.read is not guaranteed to return everything.
+    Blank and whitespace-only lines don't count: the file is hand-
+    editable, and _iter_jsonl (stats --full, dump) skips them, so a
+    plain newline tally would put the two reports at odds.
+    """
+    n = 0
+    carry = b""
+    _flush_writes(path)
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return None
+    try:
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except (AttributeError, OSError):
+            pass
+        while chunk := os.read(fd, 1 << 20):
+            parts = (carry + chunk).split(b"\n")
+            carry = parts.pop()
+            n += sum(1 for p in parts if p.strip())
+    finally:
+        os.close(fd)
+    if carry.strip():
+        n += 1  # unterminated final line
+    return n
+
+def _write_snapshot(snap_path: Path, offset: int, entries: list[dict]):
+    data = pickle.dumps({"version": SNAPSHOT_VERSION, "ch_impl": _CH_IMPL,
+                         "offset": offset, "entries": entries})
+    tmp = snap_path.with_suffix(".pkl.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, snap_path)
+
+# ── Core: taste ───────────────────────────────────────────────────────────────
+
+def _read_domain_file(domain: str, domains: list) -> list[dict]:
+    """Read entries from a single domain file."""
+    path = _get_domain_path(domain)
+    entries = _load_entries(path)
+    if not domains:
+        return list(entries)
+    query = frozenset(domains)
+    return [e for e in entries
+            if not query.isdisjoint(e.get("_dset") or _domain_set(e))]
 
 def taste(agent: str, domains: list, limit: int = TASTE_LIMIT, record: bool = True) -> list[dict]:
     """
     Read most relevant memories for agent/domain.
     Sorted by resonance score. Records taste events as feedback signal.
     """
+    _ensure_migrated()
     resonance = _load_resonance()
     entries = []
 
@@ -241,64 +712,50 @@ def taste(agent: str, domains: list, limit: int = TASTE_LIMIT, record: bool = Tr
                 domains_to_read.add("general")
         domains_to_read = list(domains_to_read)
 
-    # Also check legacy single file if it exists
-    if MYCELIUM_PATH.exists():
-        with open(MYCELIUM_PATH) as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    entry = json.loads(line)
-                    entry_domains = entry.get("domain", [])
-                    if isinstance(entry_domains, str):
-                        entry_domains = [entry_domains]
-                    if domains and not any(d in entry_domains for d in domains):
-                        continue
-                    entry["_score"] = _score(entry, resonance)
-                    entries.append(entry)
-                except json.JSONDecodeError:
-                    continue
-
     # Read from domain files
     for domain in domains_to_read:
-        entries.extend(_read_domain_file(domain, domains, resonance))
+        entries.extend(_read_domain_file(domain, domains))
 
     # v1.1: Mark superseded entries
     entries = _mark_superseded_entries(entries)
 
-    # Deprioritize self-authored entries
-    for entry in entries:
+    # Score in one batch; deprioritize self-authored entries. Scores
+    # live in the parallel list — the entry dicts alias the snapshot
+    # cache, so no scratch fields are written onto them.
+    scores = _score_many(entries, resonance)
+    for i, entry in enumerate(entries):
         if entry.get("agent") == agent:
-            entry["_self"] = True
-            entry["_score"] = entry.get("_score", 0) * 0.5
-
-    entries.sort(key=lambda e: e.get("_score", 0), reverse=True)
-    top = entries[:limit]
+            scores[i] *= 0.5
+
+    if np is not None and limit > 0 and len(entries) > limit * 4:
+        # O(N) selection: partition out the top k indices, sort only
+        # those. limit == 0 must not reach here: idx[-0:] is the whole
+        # array, where heapq (and the baseline sort) return [].
+        arr = np.asarray(scores)
+        idx = np.argpartition(arr, -limit)[-limit:]
+        top = [entries[i] for i in idx[np.argsort(-arr[idx])]]
+    else:
+        # O(N log k) top-k instead of a full O(N log N) sort
+        top = [entries[i] for i in
+               heapq.nlargest(limit, range(len(entries)), key=scores.__getitem__)]
 
     if record and top:
-        _record_taste([_entry_hash(e) for e in top])
+        _record_taste([_cached_hash(e) for e in top])
 
-    for e in top:
-        e.pop("_score", None)
-        e.pop("_self", None)
-
-    return top
+    # Hand back filtered copies, not the cached dicts themselves:
+    # popping _h/_ch/_static/_dset/_ts_epoch in place destroyed the
+    # precomputations the snapshot exists to carry, and kept a channel
+    # for private fields set elsewhere to leak into callers' results.
+    return [{k: v for k, v in e.items() if not k.startswith("_")} for e in top]
 
 # ── Core: exude ───────────────────────────────────────────────────────────────
 
-def exude(agent: str, domains: list, content: str, entry_type: str = "lesson",
-          urgency: str = "routine", confidence: str = "observation",
-          ref: Optional[str] = None, supersedes: Optional[str] = None) -> Optional[dict]:
-    """
-    Write a memory into the mycelium.
-    v1.1: Supports type (lesson/question), ref (threading), supersedes (replacement).
-    Returns None if entry was deduplicated.
-    """
-    primary_domain = domains[0] if domains else "general"
-
+def _make_entry(agent: str, domains: list, content: str, entry_type: str = "lesson",
+                urgency: str = "routine", confidence: str = "observation",
+                ref: Optional[str] = None, supersedes: Optional[str] = None) -> dict:
+    """Build an entry dict without writing it — the exude payload."""
     entry = {
-        "ts": datetime.datetime.now(datetime.UTC).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "ts": _now_stamp(),
         "agent": agent,
         "domain": domains,
         "type": entry_type,
@@ -310,17 +767,48 @@ def exude(agent: str, domains: list, content: str, entry_type: str = "lesson",
         entry["ref"] = ref
     if supersedes:
         entry["supersedes"] = supersedes
+    return entry
+
+def exude(agent: str, domains: list, content: str, entry_type: str = "lesson",
+          urgency: str = "routine", confidence: str = "observation",
+          ref: Optional[str] = None, supersedes: Optional[str] = None) -> Optional[dict]:
+    """
+    Write a memory into the mycelium.
+    v1.1: Supports type (lesson/question), ref (threading), supersedes (replacement).
+    Returns None if entry was deduplicated.
+    """
+    primary_domain = domains[0] if domains else "general"
+    entry = _make_entry(agent, domains, content, entry_type,
+                        urgency, confidence, ref, supersedes)
 
     # v1.1: Dedup check
     if _is_duplicate(primary_domain, entry):
         return None
 
     path = _get_domain_path(primary_domain)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "a") as f:
-        f.write(json.dumps(entry) + "\n")
+    _get_fh(path).write(dumpb(entry) + b"\n")
     return entry
 
+def _exude_many(entries: list[dict]) -> list[dict]:
+    """Write a batch of pre-built entries, one open + writelines per file.
+
+    Dedup runs per entry as in exude; returns the entries actually
+    written. digest/distill use this so a big context drop is one write
+    per touched domain file instead of an open/close per learning.
+    """
+    by_path: dict[Path, list[bytes]] = {}
+    written = []
+    for entry in entries:
+        domains = entry.get("domain", [])
+        primary_domain = domains[0] if domains else "general"
+        if _is_duplicate(primary_domain, entry):
+            continue
+        by_path.setdefault(_get_domain_path(primary_domain), []).append(dumpb(entry) + b"\n")
+        written.append(entry)
+    for path, lines in by_path.items():
+        _get_fh(path).writelines(lines)
+    return written
+
 # ── Phase 3: superpose ───────────────────────────────────────────────────────
 
 def superpose(agent: str, domains: list, branches: list[dict],
@@ -341,7 +829,7 @@ def superpose(agent: str, domains: list, branches: list[dict],
             b["weight"] = round(b.get("weight", 0) / total, 3)
 
     entry = {
-        "ts": datetime.datetime.now(datetime.UTC).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "ts": _now_stamp(),
         "agent": agent,
         "domain": domains,
         "type": "ghost",
@@ -358,27 +846,34 @@ def superpose(agent: str, domains: list, branches: list[dict],
         return None
 
     path = _get_domain_path(primary_domain)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "a") as f:
-        f.write(json.dumps(entry) + "\n")
+    _get_fh(path).write(dumpb(entry) + b"\n")
     return entry
 
 
-def _ghost_match_score(ghost: dict, context_keywords: list[str]) -> float:
-    """Score a ghost trace's relevance to the current context."""
-    if not context_keywords:
-        return 0.5
-
+def _ghost_tokens(ghost: dict) -> frozenset:
+    """Lowercase token set over a ghost's searchable text fields."""
     text = " ".join([
         " ".join(b.get("label", "") for b in ghost.get("branches", [])),
         " ".join(b.get("reasoning", "") for b in ghost.get("branches", [])),
         ghost.get("collapsed_to", ""),
         ghost.get("collapse_reason", ""),
         " ".join(ghost.get("domain", [])),
-    ]).lower()
+    ])
+    return frozenset(text.lower().split())
 
-    matches = sum(1 for kw in context_keywords if kw.lower() in text)
-    return matches / max(len(context_keywords), 1)
+def _ghost_match_score(ghost: dict, keywords_lower: list[str]) -> float:
+    """Score a ghost trace's relevance to the current context.
+
+    Keywords must already be lowercased; matching is hash lookups against
+    the token set built at parse time, not substring scans.
+    """
+    if not keywords_lower:
+        return 0.5
+    tokens = ghost.get("_tokens")
+    if tokens is None:
+        tokens = _ghost_tokens(ghost)
+    matches = sum(1 for kw in keywords_lower if kw in tokens)
+    return matches / len(keywords_lower)
 
 
 def taste_ghosts(agent: str, domains: list,
@@ -386,6 +881,9 @@ def taste_ghosts(agent: str, domains: list,
                  limit: int = 5) -> list[dict]:
     """Retrieve relevant ghost traces for the current agent + context."""
     resonance = _load_resonance()
+    keywords_lower = [k.lower() for k in (context_keywords or domains or [])]
+    query = frozenset(domains or [])
+    now_epoch = datetime.datetime.now(datetime.timezone.utc).timestamp()
     ghosts = []
 
     if not domains:
@@ -401,38 +899,21 @@ def taste_ghosts(agent: str, domains: list,
 
     for domain in domains_to_read:
         path = _get_domain_path(domain)
-        if not path.exists():
-            continue
-        with open(path) as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    entry = json.loads(line)
-                    if entry.get("type") != "ghost":
-                        continue
-                    entry_domains = entry.get("domain", [])
-                    if isinstance(entry_domains, str):
-                        entry_domains = [entry_domains]
-                    if domains and not any(d in entry_domains for d in domains):
-                        continue
-                    match = _ghost_match_score(entry, context_keywords or domains)
-                    base = _score(entry, resonance)
-                    entry["_ghost_score"] = match * 2 + base * 0.3
-                    ghosts.append(entry)
-                except json.JSONDecodeError:
-                    continue
+        for entry in _load_entries(path):
+            if entry.get("type") != "ghost":
+                continue
+            if query and query.isdisjoint(entry.get("_dset") or _domain_set(entry)):
+                continue
+            match = _ghost_match_score(entry, keywords_lower)
+            base = _score(entry, resonance, now_epoch)
+            ghosts.append((match * 2 + base * 0.3, entry))
 
-    ghosts.sort(key=lambda g: g.get("_ghost_score", 0), reverse=True)
-    top = ghosts[:limit]
+    top = [g for _, g in heapq.nlargest(limit, ghosts, key=lambda p: p[0])]
 
     if top:
-        _record_taste([_entry_hash(g) for g in top])
-    for g in top:
-        g.pop("_ghost_score", None)
-
-    return top
+        _record_taste([_cached_hash(g) for g in top])
+    # Filtered copies, as in taste — the ghosts alias the snapshot cache.
+    return [{k: v for k, v in g.items() if not k.startswith("_")} for g in top]
 
 # ── v1.1: migrate ─────────────────────────────────────────────────────────────
 
@@ -447,30 +928,24 @@ def migrate():
     counts = {d: 0 for d in domain_files}
     counts["other"] = 0
 
-    with open(MYCELIUM_PATH) as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                entry = json.loads(line)
-                domains = entry.get("domain", ["general"])
-                if isinstance(domains, str):
-                    domains = [domains]
-                primary_domain = domains[0].lower() if domains else "general"
-
-                if primary_domain in domain_files:
-                    path = domain_files[primary_domain]
-                    counts[primary_domain] += 1
-                else:
-                    path = MYCELIUM_DIR / f"mycelium-{primary_domain}.jsonl"
-                    counts["other"] += 1
+    for line in _iter_jsonl(MYCELIUM_PATH):
+        try:
+            entry = loads(line)
+            domains = entry.get("domain", ["general"])
+            if isinstance(domains, str):
+                domains = [domains]
+            primary_domain = domains[0].lower() if domains else "general"
+
+            if primary_domain in domain_files:
+                path = domain_files[primary_domain]
+                counts[primary_domain] += 1
+            else:
+                path = MYCELIUM_DIR / f"mycelium-{primary_domain}.jsonl"
+                counts["other"] += 1
 
-                path.parent.mkdir(parents=True, exist_ok=True)
-                with open(path, "a") as out:
-                    out.write(json.dumps(entry) + "\n")
-            except json.JSONDecodeError:
-                continue
+            _get_fh(path).write(dumpb(entry) + b"\n")
+        except json.JSONDecodeError:
+            continue
 
     total = sum(counts.values())
     print(f"\n✅ Migration complete: {total} entries migrated")
@@ -482,8 +957,32 @@ def migrate():
     MYCELIUM_PATH.rename(backup_path)
     print(f"\n  Original file backed up to: {backup_path}")
 
+def _ensure_migrated():
+    """Fold a lingering legacy mycelium.jsonl into the domain files.
+
+    Readers trigger this once so users who never ran `migrate` stop
+    paying a whole-file legacy scan on every command; after the rename
+    to .bak the exists() check is a single stat that always misses.
+    Migration chatter goes to stderr so --raw/JSON output stays clean.
+    """
+    if MYCELIUM_PATH.exists():
+        with contextlib.redirect_stdout(sys.stderr):
+            migrate()
+
 # ── Phase 2: digest ───────────────────────────────────────────────────────────
 
+# Compiled once at import. The last_conversation capture is bounded and
+# runs to end-of-line — the old (?:["\']?\n|$) terminator forced
+# backtracking over long pasted blocks. The section body starts after the
+# heading's own line, so DOTALL can't crawl back into the heading.
+_LC_RE = re.compile(r'last_conversation:[ \t]*["\']?([^\n]{1,4000})')
+_SECTION_RE = re.compile(
+    r'##\s*(?:decisions?|lessons?|learnings?|key\s+takeaways?|what\s+we\s+learned)'
+    r'[^\n]*\n(.*?)(?=##|\Z)',
+    re.IGNORECASE | re.DOTALL,
+)
+_BULLET_RE = re.compile(r'^[\-\*\•]\s+(.+)$', re.MULTILINE)
+
 def digest(agent: str, file_path: str, domains: Optional[list] = None) -> list[dict]:
     """Auto-exude from a .swivel.md context drop."""
     path = Path(file_path)
@@ -492,105 +991,197 @@ def digest(agent: str, file_path: str, domains: Optional[list] = None) -> list[d
         return []
 
     content = path.read_text()
-    exuded = []
+    candidates = []  # (progress line, entry) — printed only if written
 
     # Extract last_conversation field
-    lc_match = re.search(r'last_conversation:\s*["\']?(.+?)(?:["\']?\n|$)', content, re.MULTILINE)
+    lc_match = _LC_RE.search(content)
     if lc_match:
         lc = lc_match.group(1).strip().strip('"\'')
         if len(lc) > 20:
-            entry = exude(agent, domains or ["context"], lc,
-                         urgency="notable", confidence="observation")
-            if entry:
-                exuded.append(entry)
-                print(f"  📝 Digested last_conversation: {lc[:60]}...")
+            candidates.append((
+                f"  📝 Digested last_conversation: {lc[:60]}...",
+                _make_entry(agent, domains or ["context"], lc,
+                            urgency="notable", confidence="observation")))
 
     # Extract bullet points from decision/lessons sections
-    section_pattern = re.compile(
-        r'##\s*(decisions?|lessons?|learnings?|key\s+takeaways?|what\s+we\s+learned).*?\n(.*?)(?=##|\Z)',
-        re.IGNORECASE | re.DOTALL
-    )
-    for match in section_pattern.finditer(content):
-        section_text = match.group(2)
-        bullets = re.findall(r'^[\-\*\•]\s+(.+)$', section_text, re.MULTILINE)
-        for bullet in bullets:
-            bullet = bullet.strip()
+    for match in _SECTION_RE.finditer(content):
+        section_text = match.group(1)
+        for bmatch in _BULLET_RE.finditer(section_text):
+            bullet = bmatch.group(1).strip()
             if len(bullet) > 20:
-                entry = exude(agent, domains or ["context"], bullet,
-                             urgency="notable", confidence="hypothesis")
-                if entry:
-                    exuded.append(entry)
-                    print(f"  📝 Digested decision: {bullet[:60]}...")
+                candidates.append((
+                    f"  📝 Digested decision: {bullet[:60]}...",
+                    _make_entry(agent, domains or ["context"], bullet,
+                                urgency="notable", confidence="hypothesis")))
+
+    exuded = _exude_many([e for _, e in candidates])
+    written = {id(e) for e in exuded}
+    for progress, e in candidates:
+        if id(e) in written:
+            print(progress)
 
     print(f"\n✅ digest complete: {len(exuded)} learnings exuded from {file_path}")
     return exuded
 
 # ── Phase 2: distill ──────────────────────────────────────────────────────────
 
+SIGNAL_KEYWORDS = {
+    "fixed", "learned", "discovered", "rule", "never", "always",
+    "critical", "key", "important", "broke", "works", "lesson",
+    "pattern", "bug", "warning", "required", "must", "confirmed",
+    "insight", "found", "realized", "hard rule", "do not", "don't"
+}
+# One alternation compiled at import — a single C-level scan per sentence
+# instead of a Python substring test per keyword.
+SIGNAL_RE = re.compile(
+    r"\b(?:" + "|".join(map(re.escape, sorted(SIGNAL_KEYWORDS))) + r")\b",
+    re.IGNORECASE,
+)
+
+if ahocorasick is not None:
+    _SIGNAL_AUTOMATON = ahocorasick.Automaton()
+    for _kw in SIGNAL_KEYWORDS:
+        _SIGNAL_AUTOMATON.add_word(_kw, _kw)
+    _SIGNAL_AUTOMATON.make_automaton()
+
+    def _has_signal(sentence: str) -> bool:
+        # The automaton matches raw substrings, so re-check the \b
+        # boundaries SIGNAL_RE enforces (e.g. "key" inside "monkey").
+        s = sentence.lower()
+        for end, kw in _SIGNAL_AUTOMATON.iter(s):
+            start = end - len(kw) + 1
+            if ((start == 0 or not s[start - 1].isalnum())
+                    and (end == len(s) - 1 or not s[end + 1].isalnum())):
+                return True
+        return False
+else:
+    def _has_signal(sentence: str) -> bool:
+        return SIGNAL_RE.search(sentence) is not None
+
 def distill(agent: str, domains: list, content: str) -> list[dict]:
     """Distill free-form text into discrete learnings and auto-exude."""
-    SIGNAL_KEYWORDS = {
-        "fixed", "learned", "discovered", "rule", "never", "always",
-        "critical", "key", "important", "broke", "works", "lesson",
-        "pattern", "bug", "warning", "required", "must", "confirmed",
-        "insight", "found", "realized", "hard rule", "do not", "don't"
-    }
-
     sentences = re.split(r'(?<=[.!?])\s+', content.strip())
-    exuded = []
+    candidates = []
 
     for sentence in sentences:
         sentence = sentence.strip()
         if len(sentence) < 20:
             continue
-        lower = sentence.lower()
-        if any(kw in lower for kw in SIGNAL_KEYWORDS):
-            entry = exude(agent, domains, sentence,
-                         urgency="notable", confidence="observation")
-            if entry:
-                exuded.append(entry)
-                print(f"  ✨ Distilled: {sentence[:70]}...")
+        if _has_signal(sentence):
+            candidates.append(_make_entry(agent, domains, sentence,
+                                          urgency="notable", confidence="observation"))
+
+    exuded = _exude_many(candidates)
+    for e in exuded:
+        print(f"  ✨ Distilled: {e['content'][:70]}...")
 
     print(f"\n✅ distill complete: {len(exuded)} learnings exuded")
     return exuded
 
+# ── REPL / batch ──────────────────────────────────────────────────────────────
+
+COMMAND_HANDLERS = {
+    "exude": exude,
+    "taste": taste,
+    "taste_ghosts": taste_ghosts,
+    "superpose": superpose,
+    "distill": distill,
+    "digest": digest,
+}
+
+def _dispatch(req: dict) -> dict:
+    """Run one {"cmd": ..., "args": {...}} request against the library."""
+    cmd = req.get("cmd")
+    handler = COMMAND_HANDLERS.get(cmd)
+    if handler is None:
+        raise ValueError(f"unknown cmd: {cmd}")
+    with contextlib.redirect_stdout(sys.stderr):
+        result = handler(**req.get("args", {}))
+    return {"ok": True, "result": result}
+
+def run_batch():
+    """
+    Run a JSON array of commands from stdin in one process.
+
+    Input:  [{"cmd": "exude", "args": {...}}, ...]
+    Output: one JSON response line per command, in order.
+
+    Same dispatch as the REPL, but the whole job arrives at once — callers
+    pay a single process spawn + import for N operations.
+    """
+    ops = loads(sys.stdin.read())
+    for req in ops:
+        try:
+            response = _dispatch(req)
+        except Exception as e:
+            response = {"ok": False, "error": str(e)}
+        print(dumps(response), flush=True)
+
+def _read_frame(stream) -> Optional[bytes]:
+    header = stream.read(4)
+    if len(header) < 4:
+        return None
+    (size,) = struct.unpack("<I", header)
+    payload = stream.read(size)
+    if len(payload) < size:
+        return None
+    return payload
+
+def _write_frame(stream, payload: bytes):
+    stream.write(struct.pack("<I", len(payload)) + payload)
+    stream.flush()
+
+def repl():
+    """
+    Serve commands as length-prefixed frames over stdin/stdout.
+
+    Frame:    4-byte little-endian payload length, then the JSON payload.
+    Request:  {"cmd": "exude", "args": {"agent": ..., "domains": [...], ...}}
+    Response: {"ok": true, "result": ...} or {"ok": false, "error": "..."}
+
+    One interpreter startup serves the whole session — callers amortize
+    process spawn + import cost across many operations, and the framed
+    binary protocol skips argv copying and argparse entirely. Handler
+    print output is routed to stderr so stdout stays pure frames.
+    """
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+    while (payload := _read_frame(stdin)) is not None:
+        try:
+            req = loads(payload)
+            if req.get("cmd") == "quit":
+                break
+            response = _dispatch(req)
+        except Exception as e:
+            response = {"ok": False, "error": str(e)}
+        _write_frame(stdout, dumps(response).encode())
+
 # ── Phase 2: resonance ────────────────────────────────────────────────────────
 
 def show_resonance(top_n: int = 10, bottom: bool = False):
     """Show the most (or least) resonant memories in the substrate."""
+    _ensure_migrated()
     resonance = _load_resonance()
     entries = []
 
-    # Check all domain files + legacy
-    all_paths = list(_get_domain_files().values())
-    if MYCELIUM_PATH.exists():
-        all_paths.append(MYCELIUM_PATH)
-
-    for path in all_paths:
-        if not path.exists():
-            continue
-        with open(path) as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    entry = json.loads(line)
-                    h = _entry_hash(entry)
-                    r = resonance.get(h, {})
-                    entry["_score"] = _score(entry, resonance)
-                    entry["_taste_count"] = r.get("taste_count", 0)
-                    entry["_last_tasted"] = r.get("last_tasted", "never")
-                    entries.append(entry)
-                except json.JSONDecodeError:
-                    continue
+    for path in _get_domain_files().values():
+        entries.extend(_load_entries(path))
 
     if not entries:
         print("Mycelium is empty.")
         return
 
-    entries.sort(key=lambda e: e.get("_score", 0), reverse=not bottom)
-    shown = entries[:top_n]
+    # Batch-score the whole substrate (vectorized when NumPy is present);
+    # per-entry taste metadata is only resolved for the handful shown.
+    for entry, score in zip(entries, _score_many(entries, resonance)):
+        entry["_score"] = score
+
+    pick = heapq.nsmallest if bottom else heapq.nlargest
+    shown = pick(top_n, entries, key=lambda e: e.get("_score", 0))
+    for e in shown:
+        r = resonance.get(_cached_hash(e), {})
+        e["_taste_count"] = r.get("taste_count", 0)
+        e["_last_tasted"] = r.get("last_tasted", "never")
 
     label = "LEAST" if bottom else "MOST"
     print(f"\n── {label} RESONANT MEMORIES (top {top_n}) ──────────────────────\n")
@@ -613,8 +1204,10 @@ def show_resonance(top_n: int = 10, bottom: bool = False):
 
 def prune(min_resonance: float = 0.5, older_than_days: int = 30, dry_run: bool = True):
     """Remove low-signal noise from the substrate. Canonical/critical immune."""
+    _ensure_migrated()
     resonance = _load_resonance()
-    now = datetime.datetime.now(datetime.timezone.utc)
+    _flush_writes()
+    now_epoch = datetime.datetime.now(datetime.timezone.utc).timestamp()
 
     domain_files = _get_domain_files()
     total_pruned = 0
@@ -624,48 +1217,67 @@ def prune(min_resonance: float = 0.5, older_than_days: int = 30, dry_run: bool =
         if not path.exists():
             continue
 
-        keep = []
-        pruned = []
-
-        with open(path) as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    entry = json.loads(line)
-                except json.JSONDecodeError:
-                    keep.append(line)
-                    continue
+        kept = 0
+        pruned = 0
+        previews = []  # (ts, content head) of the first few pruned entries
 
-                if entry.get("confidence") == "canonical" or entry.get("urgency") == "critical":
-                    keep.append(json.dumps(entry))
-                    continue
+        # Stream once: kept lines pass through byte-for-byte to a temp file
+        # (no re-encode), pruned entries are reduced to preview summaries.
+        tmp = None if dry_run else open(path.with_suffix(".jsonl.tmp"), "wb")
+        try:
+            with open(path, "rb") as f:
+                for line in f:
+                    stripped = line.strip()
+                    if not stripped:
+                        continue
+                    try:
+                        entry = loads(stripped)
+                    except json.JSONDecodeError:
+                        kept += 1
+                        if tmp:
+                            tmp.write(stripped + b"\n")
+                        continue
 
-                score = _score(entry, resonance)
-                ts_str = entry.get("ts", "")
-                try:
-                    ts = datetime.datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
-                    age_days = (now - ts).total_seconds() / 86400
-                except Exception:
-                    age_days = 0
-
-                if score < min_resonance and age_days > older_than_days:
-                    pruned.append(entry)
-                else:
-                    keep.append(json.dumps(entry))
+                    drop = False
+                    if not (entry.get("confidence") == "canonical"
+                            or entry.get("urgency") == "critical"):
+                        score = _score(entry, resonance, now_epoch)
+                        age_days = (now_epoch - _entry_epoch(entry, now_epoch)) / 86400
+                        drop = score < min_resonance and age_days > older_than_days
+
+                    if drop:
+                        pruned += 1
+                        if len(previews) < 3:
+                            previews.append((entry.get("ts", "")[:10],
+                                             entry.get("content", "")[:50]))
+                    else:
+                        kept += 1
+                        if tmp:
+                            tmp.write(stripped + b"\n")
+        finally:
+            if tmp:
+                tmp.close()
 
         if pruned:
-            print(f"\n{domain}: would prune {len(pruned)}, keep {len(keep)}")
-            for p in pruned[:3]:
-                print(f"  🗑  [{p.get('ts','')[:10]}] {p.get('content','')[:50]}...")
-
-        if not dry_run and pruned:
-            with open(path, "w") as f:
-                f.write("\n".join(keep) + "\n")
+            print(f"\n{domain}: would prune {pruned}, keep {kept}")
+            for ts, head in previews:
+                print(f"  🗑  [{ts}] {head}...")
+
+        if tmp:
+            if pruned:
+                os.replace(tmp.name, path)
+                # The rewritten file invalidates the snapshot sidecar and
+                # any cached append handle (it points at the old inode)
+                _snapshot_path(path).unlink(missing_ok=True)
+                _entries_cache.pop(path, None)
+                stale_fh = _domain_fh.pop(path, None)
+                if stale_fh:
+                    stale_fh.close()
+            else:
+                os.unlink(tmp.name)
 
-        total_pruned += len(pruned)
-        total_kept += len(keep)
+        total_pruned += pruned
+        total_kept += kept
 
     print(f"\n── PRUNE {'PREVIEW (DRY RUN)' if dry_run else 'COMPLETE'} ─────────")
     print(f"  Total kept:   {total_kept}")
@@ -737,11 +1349,18 @@ def format_for_context(memories: list[dict], ghosts: Optional[list] = None) -> s
 
 # ── CLI ───────────────────────────────────────────────────────────────────────
 
-def main():
-    parser = argparse.ArgumentParser(description="Mycelium Memory — v1.1 substrate")
-    sub = parser.add_subparsers(dest="cmd")
+def _read_content_arg(content: str) -> str:
+    """Treat `--content -` as "read stdin" — large payloads skip the argv
+    copy (and its size limits) and reach the process in one read."""
+    if content == "-":
+        return sys.stdin.read()
+    return content
 
-    # taste
+# Per-subcommand (parser builder, handler) pairs. main() peeks at
+# sys.argv[1] and builds only the invoked subparser — constructing the
+# full argparse tree dominates startup for fast commands like stats.
+
+def _parse_taste(sub):
     t = sub.add_parser("taste", help="Read relevant memories")
     t.add_argument("--agent", required=True)
     t.add_argument("--domain", nargs="*", default=[])
@@ -750,7 +1369,27 @@ def main():
     t.add_argument("--no-record", action="store_true")
     t.add_argument("--ghosts", action="store_true")
 
-    # exude
+def _cmd_taste(args):
+    memories = taste(args.agent, args.domain, args.limit, record=not args.no_record)
+    ghosts_out = None
+    if args.ghosts:
+        ghosts_out = taste_ghosts(args.agent, args.domain, context_keywords=args.domain)
+    if args.raw:
+        # NDJSON straight from the serializer: dumpb emits bytes, so the
+        # print path's str round trip and re-encode never happen.
+        out = sys.stdout.buffer
+        for m in memories:
+            out.write(dumpb(m) + b"\n")
+        if ghosts_out:
+            for g in ghosts_out:
+                out.write(dumpb(g) + b"\n")
+        out.flush()
+    else:
+        print(format_for_context(memories, ghosts=ghosts_out))
+        ghost_note = f" + {len(ghosts_out)} ghost traces" if ghosts_out else ""
+        print(f"[{len(memories)} memories{ghost_note} surfaced for {args.agent} in domains: {args.domain or 'all'}]")
+
+def _parse_exude(sub):
     e = sub.add_parser("exude", help="Write a memory")
     e.add_argument("--agent", required=True)
     e.add_argument("--domain", nargs="*", default=[])
@@ -762,7 +1401,17 @@ def main():
     e.add_argument("--ref", default=None, help="Reference timestamp for threading")
     e.add_argument("--supersedes", default=None, help="Timestamp of entry this replaces")
 
-    # superpose
+def _cmd_exude(args):
+    content = _read_content_arg(args.content)
+    entry = exude(args.agent, args.domain, content, args.type,
+                  args.urgency, args.confidence, args.ref, args.supersedes)
+    if entry:
+        print(f"✅ Exuded: [{entry['ts']}] {args.agent} → {args.domain}")
+        print(f"   {content[:80]}{'...' if len(content) > 80 else ''}")
+    else:
+        print(f"⏭️  Duplicate skipped: {content[:60]}...")
+
+def _parse_superpose(sub):
     sp = sub.add_parser("superpose", help="Write a ghost trace")
     sp.add_argument("--agent", required=True)
     sp.add_argument("--domain", nargs="*", default=[])
@@ -772,137 +1421,220 @@ def main():
                     metavar="LABEL:WEIGHT:REASONING")
     sp.add_argument("--urgency", default="routine", choices=["routine", "notable", "critical"])
 
-    # migrate
+def _cmd_superpose(args):
+    parsed_branches = []
+    for b in args.branches:
+        parts = b.split(":", 2)
+        label = parts[0].strip() if len(parts) > 0 else "?"
+        weight = float(parts[1]) if len(parts) > 1 else 1.0
+        reasoning = parts[2].strip() if len(parts) > 2 else ""
+        parsed_branches.append({"label": label, "weight": weight, "reasoning": reasoning})
+    if not parsed_branches:
+        print("⚠️  No branches provided. Use --branch 'label:weight:reasoning'")
+    else:
+        entry = superpose(args.agent, args.domain, parsed_branches,
+                         args.collapsed_to, args.collapse_reason, args.urgency)
+        if entry:
+            print(f"👻 Ghost trace written: [{entry['ts']}] {args.agent}")
+        else:
+            print(f"⏭️  Duplicate ghost trace skipped")
+
+def _parse_repl(sub):
+    sub.add_parser("repl", help="Serve framed JSON commands over stdin/stdout")
+
+def _parse_batch(sub):
+    sub.add_parser("batch", help="Run a JSON array of commands from stdin")
+
+def _parse_migrate(sub):
     sub.add_parser("migrate", help="Migrate legacy mycelium.jsonl to domain files")
 
-    # digest
+def _parse_digest(sub):
     d = sub.add_parser("digest", help="Auto-exude from a .swivel.md")
     d.add_argument("--agent", required=True)
     d.add_argument("--file", required=True)
     d.add_argument("--domain", nargs="*", default=["context"])
 
-    # distill
+def _parse_distill(sub):
     di = sub.add_parser("distill", help="Distill text into learnings")
     di.add_argument("--agent", required=True)
     di.add_argument("--domain", nargs="*", default=[])
     di.add_argument("--content", required=True)
 
-    # resonance
+def _parse_resonance(sub):
     r = sub.add_parser("resonance", help="Show resonant memories")
     r.add_argument("--top", type=int, default=10)
     r.add_argument("--bottom", action="store_true")
 
-    # prune
+def _parse_prune(sub):
     p = sub.add_parser("prune", help="Remove low-resonance old memories")
     p.add_argument("--min-resonance", type=float, default=0.5)
     p.add_argument("--older-than", type=int, default=30)
     p.add_argument("--execute", action="store_true")
 
-    # dump / stats
-    sub.add_parser("dump", help="Print all memories")
-    sub.add_parser("stats", help="Print stats")
-
-    args = parser.parse_args()
-
-    if args.cmd == "taste":
-        memories = taste(args.agent, args.domain, args.limit, record=not args.no_record)
-        ghosts_out = None
-        if args.ghosts:
-            ghosts_out = taste_ghosts(args.agent, args.domain, context_keywords=args.domain)
-        if args.raw:
-            for m in memories:
-                print(json.dumps(m))
-            if ghosts_out:
-                for g in ghosts_out:
-                    print(json.dumps(g))
-        else:
-            print(format_for_context(memories, ghosts=ghosts_out))
-            ghost_note = f" + {len(ghosts_out)} ghost traces" if ghosts_out else ""
-            print(f"[{len(memories)} memories{ghost_note} surfaced for {args.agent} in domains: {args.domain or 'all'}]")
-
-    elif args.cmd == "exude":
-        entry = exude(args.agent, args.domain, args.content, args.type,
-                      args.urgency, args.confidence, args.ref, args.supersedes)
-        if entry:
-            print(f"✅ Exuded: [{entry['ts']}] {args.agent} → {args.domain}")
-            print(f"   {args.content[:80]}{'...' if len(args.content) > 80 else ''}")
-        else:
-            print(f"⏭️  Duplicate skipped: {args.content[:60]}...")
-
-    elif args.cmd == "superpose":
-        parsed_branches = []
-        for b in args.branches:
-            parts = b.split(":", 2)
-            label = parts[0].strip() if len(parts) > 0 else "?"
-            weight = float(parts[1]) if len(parts) > 1 else 1.0
-            reasoning = parts[2].strip() if len(parts) > 2 else ""
-            parsed_branches.append({"label": label, "weight": weight, "reasoning": reasoning})
-        if not parsed_branches:
-            print("⚠️  No branches provided. Use --branch 'label:weight:reasoning'")
-        else:
-            entry = superpose(args.agent, args.domain, parsed_branches,
-                             args.collapsed_to, args.collapse_reason, args.urgency)
-            if entry:
-                print(f"👻 Ghost trace written: [{entry['ts']}] {args.agent}")
-            else:
-                print(f"⏭️  Duplicate ghost trace skipped")
+@functools.cache
+def _dump_header(path) -> str:
+    """Section header for one domain file, computed once per path."""
+    return f"\n=== {path.stem.upper()} ==="
 
-    elif args.cmd == "migrate":
-        migrate()
+def _parse_dump(sub):
+    p = sub.add_parser("dump", help="Print all memories")
+    p.add_argument("--raw", action="store_true",
+                   help="Stream the raw JSONL bytes (no parsing or formatting)")
 
-    elif args.cmd == "digest":
-        digest(args.agent, args.file, args.domain)
+def _cmd_dump(args):
+    all_paths = list(_get_domain_files().values())
+    if MYCELIUM_PATH.exists():
+        all_paths.append(MYCELIUM_PATH)
+    if args.raw:
+        # Byte-for-byte copy for piping into other tools — zero parse.
+        _flush_writes()
+        out = sys.stdout.buffer
+        for path in all_paths:
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                continue
+            with f:
+                _advise_seq(f)
+                shutil.copyfileobj(f, out)
+        out.flush()
+        return
 
-    elif args.cmd == "distill":
-        distill(args.agent, args.domain, args.content)
+    def _render_dump(path) -> bytes:
+        lines = [_dump_header(path)]
 
-    elif args.cmd == "resonance":
-        show_resonance(args.top, args.bottom)
+        def fmt(m):
+            stale = " [STALE]" if m.get("stale") else ""
+            lines.append(f"[{m['ts'][:10]}] {m.get('agent','?'):8} "
+                         f"{m.get('content','')[:60]}{stale}")
 
-    elif args.cmd == "prune":
-        prune(args.min_resonance, args.older_than, dry_run=not args.execute)
+        if simdjson is not None:
+            # One structural scan over the whole file; field reads on
+            # the lazy proxies touch only the keys printed. Proxies are
+            # fully consumed before this thread's parser touches the
+            # next file, so the thread-local reuse is safe.
+            try:
+                data = path.read_bytes()
+            except FileNotFoundError:
+                return b""
+            try:
+                for m in _simd_parser().parse_many(data):
+                    fmt(m)
+                return ("\n".join(lines) + "\n").encode()
+            except Exception:
+                del lines[1:]  # corrupt line aborts the blob — re-walk
 
-    elif args.cmd == "dump":
-        all_paths = list(_get_domain_files().values())
-        if MYCELIUM_PATH.exists():
-            all_paths.append(MYCELIUM_PATH)
-        for path in all_paths:
-            if not path.exists():
-                continue
-            print(f"\n=== {path.stem.upper()} ===")
-            with open(path) as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        try:
-                            m = json.loads(line)
-                            stale = " [STALE]" if m.get("stale") else ""
-                            print(f"[{m['ts'][:10]}] {m.get('agent','?'):8} {m.get('content','')[:60]}{stale}")
-                        except:
-                            pass
-
-    elif args.cmd == "stats":
-        all_paths = list(_get_domain_files().values())
-        if MYCELIUM_PATH.exists():
-            all_paths.append(MYCELIUM_PATH)
-        total = 0
+        try:
+            for line in _iter_jsonl(path):
+                try:
+                    fmt(loads(line))
+                except:
+                    pass
+        except FileNotFoundError:
+            return b""
+        return ("\n".join(lines) + "\n").encode()
+
+    _flush_writes()
+    # Gather all rendered blocks into one writev — a single syscall for
+    # the whole report instead of a buffered write per file. writev may
+    # stop short on a full pipe, so any remainder drains through the
+    # buffered layer; platforms without writev take that path entirely.
+    blocks = [b for b in _map_scans(_render_dump, all_paths) if b]
+    if not blocks:
+        return
+    try:
+        written = os.writev(sys.stdout.fileno(), blocks)
+    except (AttributeError, OSError, ValueError):
+        written = 0
+    if written < sum(len(b) for b in blocks):
+        rest = b"".join(blocks)[written:]
+        sys.stdout.buffer.write(rest)
+        sys.stdout.buffer.flush()
+
+def _parse_stats(sub):
+    p = sub.add_parser("stats", help="Print stats")
+    p.add_argument("--full", action="store_true",
+                   help="Also print agent/domain/type histograms")
+
+def _cmd_stats(args):
+    _flush_writes()
+    all_paths = list(_get_domain_files().values())
+    if MYCELIUM_PATH.exists():
+        all_paths.append(MYCELIUM_PATH)
+    total = 0
+    for path, count in zip(all_paths, _map_scans(_count_lines, all_paths)):
+        if count is None:
+            continue
+        print(f"{path.stem}: {count} entries")
+        total += count
+    print(f"\nTotal: {total} entries")
+    if args.full:
+        # Streaming histograms — one Counter update per line, nothing
+        # materialized beyond the distinct agent/domain/type keys.
+        agents: Counter = Counter()
+        domain_counts: Counter = Counter()
+        types: Counter = Counter()
         for path in all_paths:
-            if not path.exists():
+            try:
+                for line in _iter_jsonl(path):
+                    try:
+                        e = loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    agents[e.get("agent", "?")] += 1
+                    domain_counts.update(e.get("domain") or ())
+                    types[e.get("type", "lesson")] += 1
+            except FileNotFoundError:
                 continue
-            count = sum(1 for line in open(path) if line.strip())
-            print(f"{path.stem}: {count} entries")
-            total += count
-        print(f"\nTotal: {total} entries")
-        if MYCELIUM_PATH.exists():
-            print(f"(Legacy single file still exists — run 'migrate' to split by domain)")
+        print("\nBy agent:")
+        for name, count in agents.most_common():
+            print(f"  {name}: {count}")
+        print("\nBy domain:")
+        for name, count in domain_counts.most_common():
+            print(f"  {name}: {count}")
+        print("\nBy type:")
+        for name, count in types.most_common():
+            print(f"  {name}: {count}")
+    if MYCELIUM_PATH.exists():
+        print(f"(Legacy single file still exists — run 'migrate' to split by domain)")
+
+_CLI_COMMANDS = {
+    "taste":     (_parse_taste, _cmd_taste),
+    "exude":     (_parse_exude, _cmd_exude),
+    "superpose": (_parse_superpose, _cmd_superpose),
+    "repl":      (_parse_repl, lambda args: repl()),
+    "batch":     (_parse_batch, lambda args: run_batch()),
+    "migrate":   (_parse_migrate, lambda args: migrate()),
+    "digest":    (_parse_digest, lambda args: digest(args.agent, args.file, args.domain)),
+    "distill":   (_parse_distill,
+                  lambda args: distill(args.agent, args.domain, _read_content_arg(args.content))),
+    "resonance": (_parse_resonance, lambda args: show_resonance(args.top, args.bottom)),
+    "prune":     (_parse_prune,
+                  lambda args: prune(args.min_resonance, args.older_than, dry_run=not args.execute)),
+    "dump":      (_parse_dump, _cmd_dump),
+    "stats":     (_parse_stats, _cmd_stats),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Mycelium Memory — v1.1 substrate")
+    sub = parser.add_subparsers(dest="cmd")
 
+    # Known subcommand up front: build just that parser. Anything else
+    # (no args, --help, a typo) gets the full tree so help and argparse's
+    # invalid-choice error read exactly as before.
+    peek = sys.argv[1] if len(sys.argv) > 1 else None
+    if peek in _CLI_COMMANDS:
+        _CLI_COMMANDS[peek][0](sub)
     else:
-        parser.print_help()
+        for build, _ in _CLI_COMMANDS.values():
+            build(sub)
 
+    args = parser.parse_args()
+    if args.cmd is None:
+        parser.print_help()
+        return
+    _CLI_COMMANDS[args.cmd][1](args)
 
-# Warm the dedup cache on import
-for _domain in _get_domain_files():
-    _load_domain_hashes(_domain)
 
 if __name__ == "__main__":
     main()